@@ -3,14 +3,18 @@
 HTTP route definitions — kept thin; all logic lives in services.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import aiofiles
 from fastapi import APIRouter, File, Form, Header, Request, UploadFile
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 
-from app.core.config import ALLOWED_EXTENSIONS, UPLOAD_DIR
+from app.core.config import ALLOWED_EXTENSIONS, MAX_UPLOAD_SIZE, UPLOAD_DIR
 from app.services.chatbot import RAGChatbot
 
 logger = logging.getLogger(__name__)
@@ -20,23 +24,61 @@ router = APIRouter()
 # Shared chatbot instance (one per process — single-user app)
 _chatbot: RAGChatbot = RAGChatbot()
 
+# (sha256, saved_to_disk) of the file backing the current index — re-uploads
+# of the same content skip the whole parse/embed cycle, and the flag lets a
+# re-upload that newly requests persistence save the existing vectorstore
+# instead of being short-circuited.
+_last_ingested: tuple[str, bool] | None = None
+
+# Dedicated pool for CPU-bound ingestion. PDF parsing, tokenization and the
+# numpy/faiss kernels release the GIL, so this genuinely overlaps with request
+# handling — and concurrent uploads can't starve the loop's shared
+# to_thread/run_in_threadpool pool that every other route depends on.
+_ingest_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest")
+
 
 # ── HTML views ────────────────────────────────────────────────────────────────
 
+# The home page only varies with chatbot readiness, so both variants are
+# rendered once and served from memory with an ETag afterwards.
+_home_cache: dict[bool, tuple[str, str]] = {}
+
+
+def _render_home(request: Request) -> tuple[str, str]:
+    """Return (html, etag) for the home page, rendering at most once per state."""
+    is_ready = _chatbot.is_ready
+    cached = _home_cache.get(is_ready)
+    if cached is None:
+        template = request.app.state.templates.get_template("index.html")
+        html = template.render(
+            {
+                "request": request,
+                "answer": None,
+                "question": None,
+                "upload_message": None,
+                "is_ready": is_ready,
+            }
+        )
+        etag = f'"{hashlib.md5(html.encode("utf-8")).hexdigest()}"'
+        cached = (html, etag)
+        _home_cache[is_ready] = cached
+    return cached
+
 
 @router.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    """Render the main chat page."""
-    return request.app.state.templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "answer": None,
-            "question": None,
-            "upload_message": None,
-            "is_ready": _chatbot.is_ready,
-        },
-    )
+async def home(request: Request, if_none_match: str = Header(default="")):
+    """Render the main chat page (cached, with conditional-GET support)."""
+    html, etag = _render_home(request)
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return HTMLResponse(html, headers={"ETag": etag})
+
+
+@router.head("/")
+async def home_head(request: Request):
+    """Headers-only variant — lets clients revalidate without any body."""
+    _, etag = _render_home(request)
+    return Response(media_type="text/html", headers={"ETag": etag})
 
 
 @router.post("/ask")
@@ -54,7 +96,7 @@ async def ask(
     if not question:
         answer = "⚠️ Veuillez saisir une question."
     else:
-        answer = _chatbot.ask(question)
+        answer = await _chatbot.ask(question)
 
     if "application/json" in accept:
         return JSONResponse({"answer": answer, "question": question})
@@ -71,6 +113,35 @@ async def ask(
     )
 
 
+def _sse(payload: dict) -> str:
+    """Format one server-sent event."""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_stream(question: str = Form(...)):
+    """
+    Handle a chat question with a streamed answer.
+    Emits server-sent events ({"token": ...} per chunk, then [DONE]) so the
+    client can render tokens as Groq produces them.
+    """
+    question = question.strip()
+
+    async def event_source():
+        if not question:
+            yield _sse({"token": "⚠️ Veuillez saisir une question."})
+        else:
+            async for token in _chatbot.ask_stream(question):
+                yield _sse({"token": token})
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── JSON API endpoints ────────────────────────────────────────────────────────
 
 
@@ -87,6 +158,8 @@ async def upload_file(
         400 {"ok": false, "message": "..."} on invalid input
         500 {"ok": false, "message": "..."} on ingestion error
     """
+    global _last_ingested
+
     filename = Path(file.filename).name  # strip any path component (security)
     ext = Path(filename).suffix.lower()
 
@@ -97,9 +170,18 @@ async def upload_file(
         )
 
     saved_path = UPLOAD_DIR / filename
+    digest = hashlib.sha256()
+    size = 0
     try:
-        with saved_path.open("wb") as buf:
-            shutil.copyfileobj(file.file, buf)
+        # Stream in 1 MiB chunks so large uploads never block the event loop;
+        # the hash is computed on the fly while writing.
+        async with aiofiles.open(saved_path, "wb") as buf:
+            while chunk := await file.read(1 << 20):
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    break
+                digest.update(chunk)
+                await buf.write(chunk)
     except OSError:
         logger.exception("Failed to save uploaded file: %s", saved_path)
         return JSONResponse(
@@ -107,8 +189,55 @@ async def upload_file(
             status_code=500,
         )
 
+    if size > MAX_UPLOAD_SIZE:
+        saved_path.unlink(missing_ok=True)
+        return JSONResponse(
+            {
+                "ok": False,
+                "message": f"Fichier trop volumineux (limite : {MAX_UPLOAD_SIZE // (1024 * 1024)} Mo).",
+            },
+            status_code=413,
+        )
+
+    if size == 0:
+        saved_path.unlink(missing_ok=True)
+        return JSONResponse(
+            {"ok": False, "message": "Le fichier est vide."},
+            status_code=400,
+        )
+
+    sha = digest.hexdigest()
+    if _last_ingested is not None and sha == _last_ingested[0] and _chatbot.is_ready:
+        already_saved = _last_ingested[1]
+        if save_index and not already_saved:
+            # Same content, but persistence is newly requested: save the
+            # existing vectorstore instead of re-parsing and re-embedding.
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    _ingest_executor, _chatbot.persist_index
+                )
+            except Exception as exc:
+                logger.exception("Failed to persist the index for: %s", saved_path)
+                return JSONResponse(
+                    {"ok": False, "message": f"Erreur de sauvegarde de l'index : {exc}"},
+                    status_code=500,
+                )
+            _last_ingested = (sha, True)
+            return JSONResponse(
+                {"ok": True, "message": f"✅ Fichier « {filename} » déjà indexé — index sauvegardé."}
+            )
+        logger.info("Upload matches the current index (sha256=%s) — skipping ingest.", sha[:12])
+        return JSONResponse(
+            {"ok": True, "message": f"✅ Fichier « {filename} » déjà indexé."}
+        )
+
     try:
-        _chatbot.rebuild_from_file(saved_path, save_to_disk=save_index)
+        # Ingestion (PDF parsing + embeddings) is CPU-bound — run it off-loop.
+        await asyncio.get_running_loop().run_in_executor(
+            _ingest_executor,
+            lambda: _chatbot.rebuild_from_file(saved_path, save_to_disk=save_index),
+        )
+        _last_ingested = (sha, save_index)
         return JSONResponse(
             {"ok": True, "message": f"✅ Fichier « {filename} » indexé avec succès."}
         )
@@ -22,6 +22,16 @@ GROQ_TIMEOUT: int = int(os.getenv("GROQ_TIMEOUT", "45"))
 
 # ── Embeddings ────────────────────────────────────────────────────────────────
 EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "torch" (sentence-transformers, default) or "onnx" (ONNX Runtime session
+# over an exported — optionally int8-quantized — model in EMBEDDING_ONNX_DIR).
+EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_DIR: Path = BASE_DIR / os.getenv("EMBEDDING_ONNX_DIR", "models/minilm-onnx")
+
+# ── Vector index ──────────────────────────────────────────────────────────────
+# "hnsw" (default — sub-ms ANN lookups), "ivf" (Voronoi partitioning, better
+# for large corpora), "sq8" (int8 scalar quantization, 4× smaller), "ivfpq"
+# (IVF + product quantization, for very large corpora) or "flat" (exhaustive).
+FAISS_INDEX_TYPE: str = os.getenv("FAISS_INDEX_TYPE", "hnsw").lower()
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
 FAISS_INDEX_PATH: Path = BASE_DIR / os.getenv("FAISS_INDEX_DIR", "faiss_index")
@@ -35,11 +45,20 @@ RAG_TOP_K: int = int(os.getenv("RAG_TOP_K", "4"))
 RAG_MIN_SCORE: float = float(os.getenv("RAG_MIN_SCORE", "0.6"))
 MAX_HISTORY_LENGTH: int = int(os.getenv("MAX_HISTORY_LENGTH", "6"))
 
+# ── Semantic cache ────────────────────────────────────────────────────────────
+SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+
+# ── Response cache (optional — disabled when REDIS_URL is empty) ──────────────
+REDIS_URL: str = os.getenv("REDIS_URL", "")
+RESPONSE_CACHE_TTL: int = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
 # ── App ───────────────────────────────────────────────────────────────────────
 APP_TITLE: str = "SkyBot"
 APP_DESCRIPTION: str = "Assistant IA RAG — posez vos questions sur vos documents"
 APP_VERSION: str = "1.0.0"
 ALLOWED_EXTENSIONS: frozenset = frozenset({".txt", ".pdf"})
+MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_MB", "20")) * 1024 * 1024
 
 
 def _ensure_dirs() -> None:
@@ -5,14 +5,16 @@ Run with:  uvicorn app.main:app --reload
 """
 
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from app.api.routes import router
+from app.api.routes import _chatbot, router
 from app.core.config import APP_DESCRIPTION, APP_TITLE, APP_VERSION, validate
+from app.services.chatbot import create_http_client, set_http_client
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -28,12 +30,26 @@ validate()
 # ── App ───────────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open a pooled HTTP/2 client shared by all Groq calls; close it on shutdown."""
+    http = create_http_client()
+    app.state.http = http
+    set_http_client(http)
+    yield
+    set_http_client(None)
+    await http.aclose()
+    await _chatbot.aclose()  # Redis connection of the response cache
+
+
 app = FastAPI(
     title=APP_TITLE,
     description=APP_DESCRIPTION,
     version=APP_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Static files & templates
@@ -4,12 +4,17 @@ RAG Chatbot service.
 Encapsulates vector search + LLM call + conversation history management.
 """
 
+import hashlib
+import json
 import logging
 import os
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from pathlib import Path
+from string import Template
 
-import requests
+import httpx
 from langchain_community.vectorstores import FAISS
 
 from app.core.config import (
@@ -21,8 +26,12 @@ from app.core.config import (
     MAX_HISTORY_LENGTH,
     RAG_MIN_SCORE,
     RAG_TOP_K,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_THRESHOLD,
 )
-from app.services.ingest import ingest_file, load_index
+from app.services.ingest import ingest_file, load_index, save_index
+from app.services.response_cache import ResponseCache
+from app.services.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
@@ -30,38 +39,92 @@ logger = logging.getLogger(__name__)
 
 Turn = tuple[str, str]  # (question, answer)
 
+
+def _is_error_placeholder(answer: str) -> bool:
+    """True for the transient error messages returned on Groq failures."""
+    return answer.startswith(("⏳", "⚠️", "❌"))
+
+
+def _doc_ids(docs: list) -> list[str]:
+    """Stable content-derived identifiers for a set of retrieved chunks."""
+    return [hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest() for doc in docs]
+
 # ── Groq LLM client ───────────────────────────────────────────────────────────
 
 _GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 
 
-def _call_groq(prompt: str) -> str:
-    """Call the Groq API and return the assistant message text."""
-    headers = {
+class GroqStreamError(Exception):
+    """A streamed Groq call failed (possibly mid-answer).
+
+    Raised instead of yielding the error text in-band: a message mixed into
+    the token stream would end up inside the joined answer, where it is
+    indistinguishable from model output and would get cached and replayed.
+    """
+
+    def __init__(self, user_message: str):
+        super().__init__(user_message)
+        self.user_message = user_message
+
+# Shared async client — normally created (and closed) by the app lifespan so
+# TLS/TCP connections are kept alive across requests; created lazily otherwise.
+_http_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the pooled HTTP/2 client used for all Groq calls."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=GROQ_TIMEOUT,
+    )
+
+
+def set_http_client(client: httpx.AsyncClient | None) -> None:
+    """Register the application-wide client (called from the lifespan)."""
+    global _http_client
+    _http_client = client
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+
+def _groq_headers() -> dict:
+    return {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {GROQ_API_KEY}",
     }
-    payload = {
+
+
+def _groq_payload(messages: list[dict], stream: bool = False) -> dict:
+    return {
         "model": GROQ_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
+        "messages": messages,
         "temperature": GROQ_TEMPERATURE,
         "max_tokens": GROQ_MAX_TOKENS,
         "top_p": 0.9,
-        "stream": False,
+        "stream": stream,
     }
 
+
+async def _call_groq(messages: list[dict]) -> str:
+    """Call the Groq API and return the assistant message text."""
     try:
-        response = requests.post(
-            _GROQ_URL, headers=headers, json=payload, timeout=GROQ_TIMEOUT
+        response = await _get_http_client().post(
+            _GROQ_URL, headers=_groq_headers(), json=_groq_payload(messages)
         )
         response.raise_for_status()
         return response.json()["choices"][0]["message"]["content"]
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.warning("Groq API request timed out.")
         return "⏳ La requête a pris trop de temps. Veuillez réessayer avec une question plus courte."
 
-    except requests.exceptions.HTTPError as exc:
+    except httpx.HTTPStatusError as exc:
         logger.error("Groq API HTTP error: %s — %s", exc.response.status_code, exc.response.text)
         return f"⚠️ Erreur API ({exc.response.status_code}). Veuillez réessayer."
 
@@ -70,44 +133,123 @@ def _call_groq(prompt: str) -> str:
         return "❌ Une erreur inattendue s'est produite. Veuillez réessayer."
 
 
+async def _stream_groq(messages: list[dict]) -> AsyncIterator[str]:
+    """Call the Groq API with stream=True and yield tokens as they arrive.
+
+    Raises GroqStreamError on any failure — before or after the first token —
+    so callers can report the error without treating it as answer text.
+    """
+    try:
+        async with _get_http_client().stream(
+            "POST", _GROQ_URL, headers=_groq_headers(), json=_groq_payload(messages, stream=True)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+
+    except httpx.TimeoutException as exc:
+        logger.warning("Groq API stream timed out.")
+        raise GroqStreamError(
+            "⏳ La requête a pris trop de temps. Veuillez réessayer avec une question plus courte."
+        ) from exc
+
+    except httpx.HTTPStatusError as exc:
+        logger.error("Groq API HTTP error: %s", exc.response.status_code)
+        raise GroqStreamError(
+            f"⚠️ Erreur API ({exc.response.status_code}). Veuillez réessayer."
+        ) from exc
+
+    except Exception as exc:
+        logger.exception("Unexpected error streaming from Groq API.")
+        raise GroqStreamError(
+            "❌ Une erreur inattendue s'est produite. Veuillez réessayer."
+        ) from exc
+
+
 # ── Prompt builder ────────────────────────────────────────────────────────────
 
+# Static instruction block, sent as the system message. Keeping it byte-stable
+# and first lets Groq's server-side prefix cache skip re-prefilling it on
+# every call.
+_SYSTEM_PROMPT = """Tu es SkyBot, un assistant IA spécialisé dans l'analyse de documents.
 
-def _build_prompt(question: str, context_docs: list, history: list[Turn]) -> str:
-    """Assemble the final prompt sent to the LLM."""
+INSTRUCTIONS:
+1. Réponds UNIQUEMENT en te basant sur le CONTEXTE fourni ci-dessous.
+2. Si l'information est absente du contexte, réponds : "Je ne trouve pas cette information dans le document."
+3. Sois précis, concis et factuel. Ne jamais inventer ou extrapoler.
+4. Cite tes sources quand c'est pertinent.
+5. Structure ta réponse clairement."""
+
+# User-message skeleton, parsed once at import instead of being re-assembled
+# from literal fragments on every call.
+_USER_TEMPLATE = Template(
+    """${history}QUESTION: $question
+
+RÉPONSE (basée uniquement sur le contexte):"""
+)
+
+# Formatted context blocks keyed by the retrieved doc-id tuple. Reusing the
+# byte-identical block whenever the same chunks are retrieved keeps the
+# (system + context) token prefix stable across turns, so the provider's
+# prefix cache can skip re-prefilling the document text even as history grows.
+_CONTEXT_CACHE_SIZE = 32
+_context_cache: "OrderedDict[tuple[str, ...], str]" = OrderedDict()
+
+
+def _context_block(context_docs: list, doc_ids: list[str]) -> str:
+    """Format (or reuse) the context message for a set of retrieved chunks."""
+    key = tuple(doc_ids)
+    block = _context_cache.get(key)
+    if block is not None:
+        _context_cache.move_to_end(key)
+        return block
 
-    # Context passages
     passages = []
     for i, doc in enumerate(context_docs, start=1):
         source = ""
         if getattr(doc, "metadata", {}).get("source"):
             source = f" [Source: {os.path.basename(doc.metadata['source'])}]"
         passages.append(f"--- Extrait {i}{source} ---\n{doc.page_content}")
-    context_block = "\n\n".join(passages)
+    block = "CONTEXTE DOCUMENTAIRE:\n" + "\n\n".join(passages)
+
+    _context_cache[key] = block
+    if len(_context_cache) > _CONTEXT_CACHE_SIZE:
+        _context_cache.popitem(last=False)
+    return block
+
 
+def _build_messages(
+    question: str, context_docs: list, doc_ids: list[str], history: "deque[Turn]"
+) -> list[dict]:
+    """Assemble the chat messages sent to the LLM.
+
+    Ordered most-stable-first — static instructions, then the retrieved
+    context as its own message, then history and question — so consecutive
+    turns over the same chunks share the longest possible cacheable prefix.
+    """
     # Conversation history (last 3 turns)
     history_block = ""
     if history:
         lines = []
-        for idx, (q, a) in enumerate(history[-3:], start=1):
+        for idx, (q, a) in enumerate(list(history)[-3:], start=1):
             lines.append(f"Q{idx}: {q}\nA{idx}: {a}")
         history_block = "HISTORIQUE RÉCENT:\n" + "\n\n".join(lines) + "\n\n"
 
-    return f"""Tu es SkyBot, un assistant IA spécialisé dans l'analyse de documents.
-
-INSTRUCTIONS:
-1. Réponds UNIQUEMENT en te basant sur le CONTEXTE fourni ci-dessous.
-2. Si l'information est absente du contexte, réponds : "Je ne trouve pas cette information dans le document."
-3. Sois précis, concis et factuel. Ne jamais inventer ou extrapoler.
-4. Cite tes sources quand c'est pertinent.
-5. Structure ta réponse clairement.
-
-{history_block}CONTEXTE DOCUMENTAIRE:
-{context_block}
-
-QUESTION: {question}
-
-RÉPONSE (basée uniquement sur le contexte):"""
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": _context_block(context_docs, doc_ids)},
+        {
+            "role": "user",
+            "content": _USER_TEMPLATE.substitute(history=history_block, question=question),
+        },
+    ]
 
 
 # ── Chatbot ───────────────────────────────────────────────────────────────────
@@ -123,7 +265,11 @@ class RAGChatbot:
     """
 
     _vectorstore: FAISS | None = field(default=None, init=False, repr=False)
-    _history: list[Turn] = field(default_factory=list, init=False, repr=False)
+    _history: deque[Turn] = field(
+        default_factory=lambda: deque(maxlen=MAX_HISTORY_LENGTH), init=False, repr=False
+    )
+    _semantic_cache: SemanticCache | None = field(default=None, init=False, repr=False)
+    _response_cache: ResponseCache = field(default_factory=ResponseCache, init=False, repr=False)
 
     def __post_init__(self) -> None:
         self._vectorstore = load_index()
@@ -139,9 +285,17 @@ class RAGChatbot:
     def rebuild_from_file(self, file_path: Path, save_to_disk: bool = False) -> None:
         """Replace the current vectorstore with a new one built from *file_path*."""
         self._vectorstore = ingest_file(file_path, save_to_disk=save_to_disk)
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()  # cached answers refer to the old document
         logger.info("Vectorstore rebuilt from: %s", file_path)
 
-    def ask(self, question: str, k: int = RAG_TOP_K) -> str:
+    def persist_index(self) -> None:
+        """Save the current in-memory vectorstore to disk without re-ingesting."""
+        if self._vectorstore is None:
+            raise RuntimeError("No vectorstore to persist.")
+        save_index(self._vectorstore)
+
+    async def ask(self, question: str, k: int = RAG_TOP_K) -> str:
         """Answer *question* using RAG; return a plain string."""
         if not self.is_ready:
             return (
@@ -149,15 +303,87 @@ class RAGChatbot:
                 "Veuillez importer un fichier via la zone d'upload."
             )
 
-        docs = self._retrieve(question, k)
+        qvec = self._embed_query(question)
+
+        cached = self._cache_lookup(qvec)
+        if cached is not None:
+            self._add_to_history(question, cached)
+            return cached
+
+        docs = self._retrieve(question, k, qvec=qvec)
         if not docs:
             return "🔍 Je n'ai pas trouvé d'informations pertinentes dans le document pour répondre à votre question."
 
-        prompt = _build_prompt(question, docs, self._history)
-        answer = _call_groq(prompt)
+        doc_ids = _doc_ids(docs)
+        key = ResponseCache.make_key(question, doc_ids, GROQ_MODEL, GROQ_TEMPERATURE)
+        stored = await self._response_cache.get(key)
+        if stored is not None:
+            self._cache_put(qvec, stored)
+            self._add_to_history(question, stored)
+            return stored
+
+        messages = _build_messages(question, docs, doc_ids, self._history)
+        answer = await _call_groq(messages)
+        if not _is_error_placeholder(answer):
+            await self._response_cache.set(key, answer)
+        self._cache_put(qvec, answer)
         self._add_to_history(question, answer)
         return answer
 
+    async def ask_stream(self, question: str, k: int = RAG_TOP_K) -> AsyncIterator[str]:
+        """Answer *question* using RAG; yield the answer token by token."""
+        if not self.is_ready:
+            yield (
+                "⚠️ Aucun document n'a été importé. "
+                "Veuillez importer un fichier via la zone d'upload."
+            )
+            return
+
+        qvec = self._embed_query(question)
+
+        cached = self._cache_lookup(qvec)
+        if cached is not None:
+            self._add_to_history(question, cached)
+            yield cached
+            return
+
+        docs = self._retrieve(question, k, qvec=qvec)
+        if not docs:
+            yield "🔍 Je n'ai pas trouvé d'informations pertinentes dans le document pour répondre à votre question."
+            return
+
+        doc_ids = _doc_ids(docs)
+        key = ResponseCache.make_key(question, doc_ids, GROQ_MODEL, GROQ_TEMPERATURE)
+        stored = await self._response_cache.get(key)
+        if stored is not None:
+            self._cache_put(qvec, stored)
+            self._add_to_history(question, stored)
+            yield stored
+            return
+
+        messages = _build_messages(question, docs, doc_ids, self._history)
+        parts: list[str] = []
+        try:
+            async for token in _stream_groq(messages):
+                parts.append(token)
+                yield token
+        except GroqStreamError as exc:
+            # Surface the error to the client, but store nothing: a stream
+            # that died mid-answer left a truncated reply that must not be
+            # cached or replayed from history.
+            yield ("\n\n" if parts else "") + exc.user_message
+            return
+
+        answer = "".join(parts)
+        if answer:  # a zero-token stream would otherwise cache "" and replay it
+            await self._response_cache.set(key, answer)
+            self._cache_put(qvec, answer)
+            self._add_to_history(question, answer)
+
+    async def aclose(self) -> None:
+        """Release held resources (the Redis connection); called on app shutdown."""
+        await self._response_cache.close()
+
     def clear_history(self) -> None:
         """Reset conversation history."""
         self._history.clear()
@@ -184,10 +410,33 @@ class RAGChatbot:
 
     # ── Private helpers ───────────────────────────────────────────────────────
 
-    def _retrieve(self, question: str, k: int) -> list:
+    def _embed_query(self, question: str) -> list[float]:
+        """Embed the query once; the vector is shared by cache and retrieval."""
+        return self._vectorstore.embeddings.embed_query(question)
+
+    def _cache_lookup(self, qvec: list[float]) -> str | None:
+        if self._semantic_cache is None:
+            self._semantic_cache = SemanticCache(
+                dim=len(qvec),
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                maxsize=SEMANTIC_CACHE_SIZE,
+            )
+        return self._semantic_cache.lookup(qvec)
+
+    def _cache_put(self, qvec: list[float], answer: str) -> None:
+        # Error placeholders from _call_groq are transient — never cache them.
+        if _is_error_placeholder(answer):
+            return
+        if self._semantic_cache is not None:
+            self._semantic_cache.put(qvec, answer)
+
+    def _retrieve(self, question: str, k: int, qvec: list[float] | None = None) -> list:
         """Run similarity search; fall back to plain search if scored search fails."""
         try:
-            pairs = self._vectorstore.similarity_search_with_score(question, k=k)
+            if qvec is not None:
+                pairs = self._vectorstore.similarity_search_with_score_by_vector(qvec, k=k)
+            else:
+                pairs = self._vectorstore.similarity_search_with_score(question, k=k)
             docs = [doc for doc, score in pairs if score >= RAG_MIN_SCORE]
             if docs:
                 return docs
@@ -195,9 +444,10 @@ class RAGChatbot:
         except Exception:
             logger.warning("Scored similarity search failed; using plain search.", exc_info=True)
 
+        if qvec is not None:
+            return self._vectorstore.similarity_search_by_vector(qvec, k=k)
         return self._vectorstore.similarity_search(question, k=k)
 
     def _add_to_history(self, question: str, answer: str) -> None:
+        # deque(maxlen=...) drops the oldest turn in place — no list copy.
         self._history.append((question, answer))
-        if len(self._history) > MAX_HISTORY_LENGTH:
-            self._history = self._history[-MAX_HISTORY_LENGTH:]
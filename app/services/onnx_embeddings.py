@@ -0,0 +1,89 @@
+# app/services/onnx_embeddings.py
+"""
+ONNX Runtime embedding backend.
+Drop-in replacement for the sentence-transformers MiniLM encoder: loads an
+exported (optionally int8-quantized) ONNX model and runs it on the CPU
+execution provider, skipping the PyTorch runtime entirely.
+
+Export the model once with optimum, e.g.:
+    optimum-cli export onnx -m sentence-transformers/all-MiniLM-L6-v2 models/minilm-onnx
+    (add `--optimize O2` or quantize to int8 for the fastest variant)
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+except ImportError:  # pragma: no cover — optional dependency
+    ort = None
+    AutoTokenizer = None
+
+logger = logging.getLogger(__name__)
+
+# Preferred file names inside the model directory, fastest first.
+_MODEL_FILES = ("model_quantized.onnx", "model_int8.onnx", "model.onnx")
+
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """MiniLM sentence embeddings via ONNX Runtime (mean pooling + L2 norm)."""
+
+    def __init__(self, model_dir: Path, batch_size: int = 64) -> None:
+        if ort is None:
+            raise ImportError(
+                "The onnx embedding backend requires `onnxruntime` and `transformers`."
+            )
+        model_path = next(
+            (model_dir / name for name in _MODEL_FILES if (model_dir / name).exists()),
+            None,
+        )
+        if model_path is None:
+            raise FileNotFoundError(f"No ONNX model found in {model_dir}")
+
+        self._batch_size = batch_size
+        self._tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {inp.name for inp in self._session.get_inputs()}
+        logger.info("ONNX embedding session ready: %s", model_path.name)
+
+    # ── Embeddings interface ──────────────────────────────────────────────────
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = [
+            vec
+            for start in range(0, len(texts), self._batch_size)
+            for vec in self._encode(texts[start : start + self._batch_size])
+        ]
+        return [vec.tolist() for vec in vectors]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._encode([text])[0].tolist()
+
+    # ── Private helpers ───────────────────────────────────────────────────────
+
+    def _encode(self, batch: list[str]) -> np.ndarray:
+        encoded = self._tokenizer(
+            batch, padding=True, truncation=True, max_length=256, return_tensors="np"
+        )
+        feed = {
+            name: encoded[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in encoded
+        }
+        hidden = self._session.run(None, feed)[0]  # (batch, seq, dim)
+
+        # Mean pooling over real tokens, then L2 normalization.
+        mask = encoded["attention_mask"][..., np.newaxis].astype(np.float32)
+        summed = (hidden * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        vectors = summed / counts
+        norms = np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return (vectors / norms).astype(np.float32)
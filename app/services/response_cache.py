@@ -0,0 +1,76 @@
+# app/services/response_cache.py
+"""
+Redis-backed LLM response cache.
+Persists exact (question, retrieved docs, model, temperature) -> answer mappings across
+processes and restarts. Optional: activates only when REDIS_URL is set and
+the redis package is installed; otherwise every call is a transparent miss.
+"""
+
+import hashlib
+import logging
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover — optional dependency
+    aioredis = None
+
+from app.core.config import REDIS_URL, RESPONSE_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "skybot:answer:"
+
+
+class ResponseCache:
+    """Thin wrapper around an async Redis client; never raises to callers."""
+
+    def __init__(self, url: str = REDIS_URL, ttl: int = RESPONSE_CACHE_TTL) -> None:
+        self._ttl = ttl
+        self._client = None
+        if url and aioredis is not None:
+            self._client = aioredis.from_url(url, decode_responses=True)
+        elif url:
+            logger.warning("REDIS_URL is set but the redis package is not installed.")
+
+    @property
+    def enabled(self) -> bool:
+        return self._client is not None
+
+    @staticmethod
+    def make_key(question: str, doc_ids: list[str], model: str, temperature: float) -> str:
+        """Deterministic key over everything that shapes the answer.
+
+        Temperature is part of the key: entries cached at one setting must
+        not be served after the operator changes it.
+        """
+        digest = hashlib.sha256()
+        digest.update(question.strip().encode("utf-8"))
+        for doc_id in sorted(doc_ids):
+            digest.update(doc_id.encode("utf-8"))
+        digest.update(model.encode("utf-8"))
+        digest.update(str(temperature).encode("utf-8"))
+        return _KEY_PREFIX + digest.hexdigest()
+
+    async def get(self, key: str) -> str | None:
+        if self._client is None:
+            return None
+        try:
+            return await self._client.get(key)
+        except Exception:
+            logger.warning("Redis GET failed — treating as cache miss.", exc_info=True)
+            return None
+
+    async def set(self, key: str, answer: str) -> None:
+        if self._client is None:
+            return
+        try:
+            await self._client.set(key, answer, ex=self._ttl)
+        except Exception:
+            logger.warning("Redis SET failed — answer not cached.", exc_info=True)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception:
+                pass
@@ -0,0 +1,149 @@
+# app/services/semantic_cache.py
+"""
+Semantic answer cache.
+Returns a previously generated answer when a new query embedding is nearly
+identical (cosine similarity above a threshold) to one already answered,
+skipping the FAISS search and the LLM call entirely.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Dimensions are scanned in segments of this size by the early-abort kernel.
+_SCAN_BLOCK = 64
+
+
+def _early_abort_l2(
+    query: np.ndarray, matrix: np.ndarray, max_sq_dist: float
+) -> tuple[int | None, float]:
+    """Batched L2 scan of *matrix* rows against *query* with early abort.
+
+    Squared distance accumulates monotonically over dimension blocks, so any
+    row whose partial sum already exceeds *max_sq_dist* can never qualify and
+    is dropped from the remaining blocks. Returns (best row index, its
+    squared distance), or (None, inf) if no row is within the bound.
+    """
+    alive = np.arange(matrix.shape[0])
+    partial = np.zeros(matrix.shape[0], dtype=np.float32)
+    for start in range(0, matrix.shape[1], _SCAN_BLOCK):
+        seg = matrix[alive, start : start + _SCAN_BLOCK] - query[start : start + _SCAN_BLOCK]
+        partial[alive] += np.einsum("ij,ij->i", seg, seg)
+        alive = alive[partial[alive] <= max_sq_dist]
+        if alive.size == 0:
+            return None, float("inf")
+    best = alive[np.argmin(partial[alive])]
+    return int(best), float(partial[best])
+
+
+class SemanticCache:
+    """
+    LRU cache keyed by L2-normalized query embeddings.
+
+    Candidate entries are pre-filtered with random-hyperplane LSH buckets
+    (O(1) per lookup), then confirmed with an exact dot product so a hit is
+    only reported when cosine similarity >= *threshold*. To tolerate vectors
+    that land just across a hyperplane, lookup also probes every bucket at
+    Hamming distance 1 from the query's bucket (multi-probe LSH).
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        threshold: float = 0.95,
+        maxsize: int = 1024,
+        n_planes: int = 8,
+        seed: int = 0,
+    ) -> None:
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.dim = dim
+        self.threshold = threshold
+        self.maxsize = maxsize
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((n_planes, dim)).astype(np.float32)
+        # insertion id -> (normalized vector, cached value)
+        self._entries: OrderedDict[int, tuple[np.ndarray, Any]] = OrderedDict()
+        # LSH bucket hash -> set of insertion ids
+        self._buckets: dict[int, set[int]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ── Public interface ──────────────────────────────────────────────────────
+
+    def lookup(self, vector: list[float] | np.ndarray) -> Any | None:
+        """Return the cached value for the closest entry, or None on miss."""
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        qvec = self._normalize(vector)
+        candidate_ids = [
+            entry_id
+            for bucket in self._probe_buckets(qvec)
+            for entry_id in self._buckets.get(bucket, ())
+        ]
+        if not candidate_ids:
+            self.misses += 1
+            return None
+
+        # On unit vectors, cos >= threshold  <=>  ||a - b||² <= 2 - 2·threshold.
+        matrix = np.stack([self._entries[i][0] for i in candidate_ids])
+        best_row, sq_dist = _early_abort_l2(qvec, matrix, 2.0 - 2.0 * self.threshold)
+        if best_row is None:
+            self.misses += 1
+            return None
+
+        best_id = candidate_ids[best_row]
+        self.hits += 1
+        self._entries.move_to_end(best_id)  # LRU refresh
+        logger.debug("Semantic cache hit (similarity=%.3f).", 1.0 - sq_dist / 2.0)
+        return self._entries[best_id][1]
+
+    def put(self, vector: list[float] | np.ndarray, value: Any) -> None:
+        """Store *value* under the embedding *vector*, evicting LRU if full."""
+        qvec = self._normalize(vector)
+        if len(self._entries) >= self.maxsize:
+            self._evict_oldest()
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (qvec, value)
+        self._buckets.setdefault(self._hash(qvec), set()).add(entry_id)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── Private helpers ───────────────────────────────────────────────────────
+
+    def _normalize(self, vector: list[float] | np.ndarray) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def _hash(self, vec: np.ndarray) -> int:
+        """Random-hyperplane signature packed into an int."""
+        bits = (self._planes @ vec) >= 0
+        return sum(1 << i for i, b in enumerate(bits) if b)
+
+    def _probe_buckets(self, vec: np.ndarray) -> list[int]:
+        """The query's own bucket plus all buckets one bit-flip away."""
+        base = self._hash(vec)
+        return [base] + [base ^ (1 << i) for i in range(len(self._planes))]
+
+    def _evict_oldest(self) -> None:
+        entry_id, (vec, _) = self._entries.popitem(last=False)
+        bucket = self._buckets.get(self._hash(vec))
+        if bucket:
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[self._hash(vec)]
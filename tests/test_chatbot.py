@@ -0,0 +1,87 @@
+# tests/test_chatbot.py
+"""
+Unit tests for streamed-answer bookkeeping (caching + history).
+Run with:  pytest tests/ -v
+"""
+
+import os
+
+# ── Set a dummy API key before importing app modules ──────────────────────────
+os.environ.setdefault("GROQ_API_KEY", "test-key-placeholder")
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+from app.services import chatbot as chatbot_module  # noqa: E402
+from app.services.chatbot import GroqStreamError, RAGChatbot  # noqa: E402
+
+
+class _FakeEmbeddings:
+    def embed_query(self, text):
+        vec = np.ones(8, dtype=np.float32)
+        return [float(x) for x in vec / np.linalg.norm(vec)]
+
+
+class _FakeVectorstore:
+    embeddings = _FakeEmbeddings()
+
+    def similarity_search_with_score_by_vector(self, qvec, k):
+        return [(Document(page_content="Un extrait du document."), 0.9)]
+
+
+def _make_bot() -> RAGChatbot:
+    bot = RAGChatbot()
+    bot._vectorstore = _FakeVectorstore()
+    return bot
+
+
+@pytest.mark.asyncio
+async def test_stream_success_is_recorded(monkeypatch):
+    async def ok_stream(messages):
+        yield "Bonjour"
+        yield " !"
+
+    monkeypatch.setattr(chatbot_module, "_stream_groq", ok_stream)
+    bot = _make_bot()
+
+    tokens = [token async for token in bot.ask_stream("Une question ?")]
+    assert "".join(tokens) == "Bonjour !"
+    assert list(bot._history) == [("Une question ?", "Bonjour !")]
+    assert len(bot._semantic_cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_stream_is_not_cached(monkeypatch):
+    """A stream that completes without tokens must not cache an empty answer."""
+
+    async def empty_stream(messages):
+        return
+        yield  # pragma: no cover — makes this an async generator
+
+    monkeypatch.setattr(chatbot_module, "_stream_groq", empty_stream)
+    bot = _make_bot()
+
+    tokens = [token async for token in bot.ask_stream("Une question ?")]
+    assert tokens == []
+    assert len(bot._history) == 0
+    assert len(bot._semantic_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_error_is_surfaced_but_never_cached(monkeypatch):
+    """A stream that dies mid-answer must not leave a truncated cached reply."""
+
+    async def broken_stream(messages):
+        yield "Début de la répon"
+        raise GroqStreamError("⚠️ Erreur API (503). Veuillez réessayer.")
+
+    monkeypatch.setattr(chatbot_module, "_stream_groq", broken_stream)
+    bot = _make_bot()
+
+    tokens = [token async for token in bot.ask_stream("Une question ?")]
+    assert tokens[0] == "Début de la répon"
+    assert "⚠️" in tokens[-1]
+    # Neither history nor the semantic cache may retain the partial answer
+    assert len(bot._history) == 0
+    assert len(bot._semantic_cache) == 0
@@ -0,0 +1,91 @@
+# tests/test_ingest.py
+"""
+Unit tests for document splitting.
+Run with:  pytest tests/ -v
+"""
+
+import os
+
+# ── Set a dummy API key before importing app modules ──────────────────────────
+os.environ.setdefault("GROQ_API_KEY", "test-key-placeholder")
+
+import pickle  # noqa: E402
+
+import faiss  # noqa: E402
+import numpy as np  # noqa: E402
+from langchain_community.docstore.in_memory import InMemoryDocstore  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from app.core.config import CHUNK_OVERLAP, CHUNK_SIZE  # noqa: E402
+from app.services import ingest  # noqa: E402
+from app.services.ingest import _split_documents, _split_text  # noqa: E402
+
+# ── _split_text ───────────────────────────────────────────────────────────────
+
+
+def test_short_text_is_one_chunk():
+    assert _split_text("Un petit paragraphe.") == ["Un petit paragraphe."]
+
+
+def test_chunks_respect_max_size():
+    text = "\n\n".join(f"Paragraphe {i}. " + "mot " * 80 for i in range(20))
+    chunks = _split_text(text)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+
+
+def test_consecutive_chunks_overlap():
+    text = "\n\n".join("phrase " * 60 for _ in range(10))
+    chunks = _split_text(text)
+    assert len(chunks) > 1
+    # Each chunk starts with the tail of the previous one
+    assert chunks[1].startswith(chunks[0][-CHUNK_OVERLAP:])
+
+
+def test_unbreakable_run_is_hard_sliced():
+    chunks = _split_text("x" * (3 * CHUNK_SIZE))
+    assert len(chunks) >= 3
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+
+
+# ── _split_documents ──────────────────────────────────────────────────────────
+
+
+def test_split_documents_preserves_metadata():
+    doc = Document(page_content="Contenu. " * 300, metadata={"source": "a.pdf", "page": 2})
+    chunks = _split_documents([doc])
+    assert len(chunks) > 1
+    assert all(chunk.metadata == {"source": "a.pdf", "page": 2} for chunk in chunks)
+
+
+# ── load_index ────────────────────────────────────────────────────────────────
+
+
+class _FakeEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0, 0.0]
+
+
+def test_load_index_rejects_legacy_l2_index(tmp_path, monkeypatch):
+    """An index persisted before the inner-product switch must not be loaded."""
+    index_path = tmp_path / "faiss_index"
+    index_path.mkdir()
+    monkeypatch.setattr(ingest, "FAISS_INDEX_PATH", index_path)
+    monkeypatch.setattr(ingest, "_INDEX_LOCK_PATH", tmp_path / "faiss_index.lock")
+    monkeypatch.setattr(ingest, "_get_embeddings", _FakeEmbeddings)
+
+    legacy = faiss.IndexFlatL2(4)
+    legacy.add(np.eye(4, dtype=np.float32))
+    faiss.write_index(legacy, str(index_path / "index.faiss"))
+    ids = [str(i) for i in range(4)]
+    docstore = InMemoryDocstore(
+        {i: Document(page_content=f"chunk {i}") for i in ids}
+    )
+    with (index_path / "index.pkl").open("wb") as f:
+        pickle.dump((docstore, dict(enumerate(ids))), f)
+
+    assert ingest.load_index() is None
@@ -14,11 +14,18 @@ from fastapi.testclient import TestClient
 # ── Set a dummy API key before importing the app ──────────────────────────────
 os.environ.setdefault("GROQ_API_KEY", "test-key-placeholder")
 
-from app.main import app  # noqa: E402  (import after env setup)
+from app.api import routes  # noqa: E402  (import after env setup)
+from app.main import app  # noqa: E402
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def _tmp_upload_dir(tmp_path, monkeypatch):
+    """Redirect uploads to a per-test tmp dir so no artifacts land in uploads/."""
+    monkeypatch.setattr(routes, "UPLOAD_DIR", tmp_path)
+
+
 # ── Home page ─────────────────────────────────────────────────────────────────
 
 
@@ -28,6 +35,20 @@ def test_home_returns_200():
     assert "SkyBot" in response.text
 
 
+def test_home_conditional_get_returns_304():
+    first = client.get("/")
+    etag = first.headers["etag"]
+    second = client.get("/", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+
+
+def test_home_head_is_cheap():
+    response = client.head("/")
+    assert response.status_code == 200
+    assert "etag" in response.headers
+
+
 # ── Status endpoint ───────────────────────────────────────────────────────────
 
 
@@ -68,6 +89,18 @@ def test_ask_empty_question():
     assert "answer" in data
 
 
+# ── /ask/stream ───────────────────────────────────────────────────────────────
+
+
+def test_ask_stream_no_document_emits_sse():
+    """The streaming endpoint should emit SSE events and terminate with [DONE]."""
+    response = client.post("/ask/stream", data={"question": "Quel est le nombre de passagers ?"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.count("data: ") >= 2  # at least one token + [DONE]
+    assert response.text.rstrip().endswith("data: [DONE]")
+
+
 # ── /upload ───────────────────────────────────────────────────────────────────
 
 
@@ -100,6 +133,89 @@ def test_upload_valid_txt(mock_rebuild):
     mock_rebuild.assert_called_once()
 
 
+def test_upload_empty_file():
+    response = client.post(
+        "/upload",
+        files={"file": ("empty.txt", BytesIO(b""), "text/plain")},
+        data={"save_index": "false"},
+    )
+    assert response.status_code == 400
+    assert response.json()["ok"] is False
+
+
+def test_upload_too_large():
+    from app.core.config import MAX_UPLOAD_SIZE
+
+    big_file = BytesIO(b"x" * (MAX_UPLOAD_SIZE + 1))
+    response = client.post(
+        "/upload",
+        files={"file": ("big.txt", big_file, "text/plain")},
+        data={"save_index": "false"},
+    )
+    assert response.status_code == 413
+    assert response.json()["ok"] is False
+
+
+@patch("app.api.routes._chatbot.rebuild_from_file")
+def test_upload_same_content_skips_reingest(mock_rebuild):
+    """Re-uploading identical content while the index is live skips ingestion."""
+    mock_rebuild.return_value = None
+    payload = b"Same airport data."
+    response = client.post(
+        "/upload",
+        files={"file": ("dup.txt", BytesIO(payload), "text/plain")},
+        data={"save_index": "false"},
+    )
+    assert response.status_code == 200
+    assert mock_rebuild.call_count == 1
+
+    # Simulate a ready chatbot (the mock didn't build a real vectorstore)
+    routes._chatbot._vectorstore = object()
+    try:
+        response = client.post(
+            "/upload",
+            files={"file": ("dup.txt", BytesIO(payload), "text/plain")},
+            data={"save_index": "false"},
+        )
+        assert response.status_code == 200
+        assert "déjà" in response.json()["message"]
+        assert mock_rebuild.call_count == 1  # not called again
+    finally:
+        routes._chatbot._vectorstore = None
+        routes._last_ingested = None
+
+
+@patch("app.api.routes._chatbot.persist_index")
+@patch("app.api.routes._chatbot.rebuild_from_file")
+def test_upload_same_content_with_save_persists_index(mock_rebuild, mock_persist):
+    """A re-upload that newly requests persistence must save the index."""
+    mock_rebuild.return_value = None
+    mock_persist.return_value = None
+    payload = b"Same airport data, now persisted."
+    response = client.post(
+        "/upload",
+        files={"file": ("dup.txt", BytesIO(payload), "text/plain")},
+        data={"save_index": "false"},
+    )
+    assert response.status_code == 200
+
+    routes._chatbot._vectorstore = object()
+    try:
+        response = client.post(
+            "/upload",
+            files={"file": ("dup.txt", BytesIO(payload), "text/plain")},
+            data={"save_index": "true"},
+        )
+        assert response.status_code == 200
+        assert "sauvegardé" in response.json()["message"]
+        mock_persist.assert_called_once()
+        assert mock_rebuild.call_count == 1  # no re-ingest
+        assert routes._last_ingested[1] is True
+    finally:
+        routes._chatbot._vectorstore = None
+        routes._last_ingested = None
+
+
 # ── Clear history ─────────────────────────────────────────────────────────────
 
 
@@ -0,0 +1,89 @@
+# tests/test_semantic_cache.py
+"""
+Unit tests for the semantic answer cache.
+Run with:  pytest tests/ -v
+"""
+
+import numpy as np
+
+from app.services.semantic_cache import SemanticCache, _early_abort_l2
+
+
+def _unit(vec):
+    arr = np.asarray(vec, dtype=np.float32)
+    return arr / np.linalg.norm(arr)
+
+
+# ── Hit / miss behaviour ──────────────────────────────────────────────────────
+
+
+def test_exact_vector_hits():
+    cache = SemanticCache(dim=4)
+    vec = _unit([1.0, 2.0, 3.0, 4.0])
+    cache.put(vec, "answer")
+    assert cache.lookup(vec) == "answer"
+
+
+def test_near_duplicate_hits():
+    cache = SemanticCache(dim=4, threshold=0.95)
+    cache.put(_unit([1.0, 2.0, 3.0, 4.0]), "answer")
+    # Small perturbation — cosine similarity stays above 0.95
+    assert cache.lookup(_unit([1.01, 2.0, 3.0, 4.02])) == "answer"
+
+
+def test_dissimilar_vector_misses():
+    cache = SemanticCache(dim=4, threshold=0.95)
+    cache.put(_unit([1.0, 0.0, 0.0, 0.0]), "answer")
+    assert cache.lookup(_unit([0.0, 1.0, 0.0, 0.0])) is None
+
+
+def test_empty_cache_misses():
+    cache = SemanticCache(dim=4)
+    assert cache.lookup(_unit([1.0, 0.0, 0.0, 0.0])) is None
+
+
+# ── Early-abort scan kernel ───────────────────────────────────────────────────
+
+
+def test_early_abort_matches_exhaustive_scan():
+    rng = np.random.default_rng(42)
+    query = _unit(rng.standard_normal(128))
+    matrix = np.stack([_unit(rng.standard_normal(128)) for _ in range(50)])
+    matrix[17] = _unit(query + 0.01 * rng.standard_normal(128))
+
+    sq_dists = ((matrix - query) ** 2).sum(axis=1)
+    best_row, best_sq = _early_abort_l2(query, matrix, max_sq_dist=0.5)
+    assert best_row == int(np.argmin(sq_dists)) == 17
+    assert abs(best_sq - float(sq_dists[17])) < 1e-5
+
+
+def test_early_abort_returns_none_outside_bound():
+    query = np.zeros(8, dtype=np.float32)
+    matrix = np.ones((3, 8), dtype=np.float32)
+    best_row, best_sq = _early_abort_l2(query, matrix, max_sq_dist=1.0)
+    assert best_row is None
+    assert best_sq == float("inf")
+
+
+# ── Eviction ──────────────────────────────────────────────────────────────────
+
+
+def test_lru_eviction():
+    cache = SemanticCache(dim=4, maxsize=2)
+    a = _unit([1.0, 0.0, 0.0, 0.0])
+    b = _unit([0.0, 1.0, 0.0, 0.0])
+    c = _unit([0.0, 0.0, 1.0, 0.0])
+    cache.put(a, "a")
+    cache.put(b, "b")
+    cache.put(c, "c")  # evicts a (least recently used)
+    assert len(cache) == 2
+    assert cache.lookup(a) is None
+    assert cache.lookup(b) == "b"
+    assert cache.lookup(c) == "c"
+
+
+def test_clear():
+    cache = SemanticCache(dim=4)
+    cache.put(_unit([1.0, 0.0, 0.0, 0.0]), "a")
+    cache.clear()
+    assert len(cache) == 0